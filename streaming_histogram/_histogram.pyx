@@ -0,0 +1,91 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+#
+#   C implementation of the streaming path of StreamingHistogram, see histogram.py.
+#   Build in place with: python setup.py build_ext --inplace
+#
+
+from libc.stdint cimport int64_t
+from libc.string cimport memmove
+
+
+cdef inline Py_ssize_t _push(double* centroids, int64_t* counts, Py_ssize_t n, Py_ssize_t max_buckets, double value,
+                             bint* combined) noexcept nogil:
+    """
+    Push one value into the sorted buckets, combining the 2 buckets with the least gap between centroids if there are
+    more than max_buckets.  Sets combined when the buckets were combined
+    :return: New number of buckets
+    """
+    cdef Py_ssize_t j, lo, hi, mid, index
+    cdef double gap, min_gap
+    cdef int64_t new_count
+
+    # Find the position of the value in the sorted centroids, same as bisect_left
+    lo = 0
+    hi = n
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if centroids[mid] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo < n and centroids[lo] == value:
+        counts[lo] += 1
+        return n
+
+    # Shift the buckets after the position by one to make room for the new one
+    if lo < n:
+        memmove(&centroids[lo + 1], &centroids[lo], (n - lo) * sizeof(double))
+        memmove(&counts[lo + 1], &counts[lo], (n - lo) * sizeof(int64_t))
+    centroids[lo] = value
+    counts[lo] = 1
+    n += 1
+    if n <= max_buckets:
+        return n
+
+    # Find 2 buckets with the least gap between centroid values, the first one if there are many
+    index = 0
+    min_gap = centroids[1] - centroids[0]
+    for j in range(1, n - 1):
+        gap = centroids[j + 1] - centroids[j]
+        if gap < min_gap:
+            min_gap = gap
+            index = j
+
+    # Merge the 2nd one into first and shift the buckets after the pair by one to fill the gap
+    new_count = counts[index] + counts[index + 1]
+    # Buckets left empty by reshape have no weight, the merged bucket keeps the left centroid
+    if new_count > 0:
+        centroids[index] = (centroids[index] * counts[index] + centroids[index + 1] * counts[index + 1]) / new_count
+    counts[index] = new_count
+    if index + 2 < n:
+        memmove(&centroids[index + 1], &centroids[index + 2], (n - index - 2) * sizeof(double))
+        memmove(&counts[index + 1], &counts[index + 2], (n - index - 2) * sizeof(int64_t))
+    combined[0] = True
+    return n - 1
+
+
+def push_value(double[::1] centroids, int64_t[::1] counts, Py_ssize_t n, Py_ssize_t max_buckets, double value):
+    """
+    Same as StreamingHistogram.push_value on the bucket arrays.  The arrays must have room for one bucket over
+    max(n, max_buckets)
+    :return: New number of buckets, whether the buckets were combined
+    """
+    cdef bint combined = False
+    n = _push(&centroids[0], &counts[0], n, max_buckets, value, &combined)
+    return n, combined
+
+
+def push_values(double[::1] centroids, int64_t[::1] counts, Py_ssize_t n, Py_ssize_t max_buckets,
+                const double[::1] values):
+    """
+    Push the values one by one into the sorted buckets, combining the 2 buckets with the least gap between centroids
+    whenever there are more than max_buckets.  Same as StreamingHistogram.push_value, without touching a Python object
+    per value.  The arrays must have room for one bucket over max(n, max_buckets)
+    :return: New number of buckets
+    """
+    cdef Py_ssize_t i
+    cdef bint combined = False
+
+    for i in range(values.shape[0]):
+        n = _push(&centroids[0], &counts[0], n, max_buckets, values[i], &combined)
+    return n
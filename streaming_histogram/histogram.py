@@ -5,9 +5,25 @@
 #
 
 import bisect
+import heapq
+import math
+import operator
+from collections.abc import Sequence
 
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional C implementation of the streaming path, see setup.py
+try:
+    from _histogram import push_value as _c_push_value, push_values as _c_push_values
+except ImportError:
+    _c_push_value = None
+    _c_push_values = None
+
 
 class HistogramBucket(object):
 
@@ -35,6 +51,295 @@ class HistogramBucket(object):
         return self.centroid == other.centroid and self.count == other.count
 
 
+def _as_array(values):
+    """
+    Values as a flat float64 array.  Values can be an array, a sequence or any other iterable like a generator
+    """
+    if isinstance(values, (np.ndarray, Sequence)):
+        return np.asarray(values, dtype=np.float64).ravel()
+    return np.fromiter(values, dtype=np.float64)
+
+
+def _move(array, start, stop, offset):
+    """
+    Move array[start:stop] by offset positions, in place
+    """
+    array[start + offset:stop + offset] = array[start:stop]
+
+
+def _insert_bucket(centroids, counts, n, pos, centroid, count):
+    """
+    Insert the bucket at pos, the arrays must have room for one more bucket
+    :return: New number of buckets
+    """
+    # Shift the buckets after pos by one to make room for the new one
+    _move(centroids, pos, n, 1)
+    _move(counts, pos, n, 1)
+    centroids[pos] = centroid
+    counts[pos] = count
+    return n + 1
+
+
+def _merge_pair(centroids, counts, n, index):
+    """
+    Merge the bucket at index + 1 into the bucket at index
+    :return: New number of buckets
+    """
+    new_count = counts[index] + counts[index + 1]
+    # Buckets left empty by reshape have no weight, the merged bucket keeps the left centroid
+    if new_count > 0:
+        centroids[index] = (centroids[index] * counts[index] + centroids[index + 1] * counts[index + 1]) / new_count
+    counts[index] = new_count
+
+    # Shift the buckets after the pair by one to fill the gap of the merged bucket
+    _move(centroids, index + 2, n, -1)
+    _move(counts, index + 2, n, -1)
+    return n - 1
+
+
+def _combine_min(centroids, counts, n):
+    """
+    Merge the 2 buckets with the least gap between centroid values, the first pair if there are many
+    :return: New number of buckets
+    """
+    index = int((centroids[1:n] - centroids[:n - 1]).argmin())
+    return _merge_pair(centroids, counts, n, index)
+
+
+def _push_value(centroids, counts, n, max_buckets, value):
+    """
+    Push one value into the sorted buckets, combining the closest pair if there are more than max_buckets
+    :return: New number of buckets, whether the buckets were combined
+    """
+    pos = bisect.bisect_left(centroids, value, 0, n)
+    if pos < n and centroids[pos] == value:
+        counts[pos] += 1
+        return n, False
+    n = _insert_bucket(centroids, counts, n, pos, value, 1)
+    if n <= max_buckets:
+        return n, False
+    return _combine_min(centroids, counts, n), True
+
+
+def _push_values(centroids, counts, n, max_buckets, values):
+    """
+    Push the values one by one into the sorted buckets, same as _push_value for each of them
+    :return: New number of buckets
+    """
+    # Python lists are a lot faster than numpy arrays one element at a time, results are written back at the end.
+    # The gaps between the centroids are kept along, only the ones next to an inserted / merged bucket change.
+    centroid_list = centroids[:n].tolist()
+    count_list = counts[:n].tolist()
+    gap_list = list(map(operator.sub, centroid_list[1:], centroid_list))
+    for value in values.tolist():
+        pos = bisect.bisect_left(centroid_list, value)
+        if pos < len(centroid_list) and centroid_list[pos] == value:
+            count_list[pos] += 1
+            continue
+        centroid_list.insert(pos, value)
+        count_list.insert(pos, 1)
+        # The new bucket splits the gap it falls in, into the gaps on either side of it
+        last = len(centroid_list) - 1
+        if 0 < pos < last:
+            gap_list[pos - 1:pos] = [value - centroid_list[pos - 1], centroid_list[pos + 1] - value]
+        elif pos == 0 and last > 0:
+            gap_list.insert(0, centroid_list[1] - value)
+        elif pos == last > 0:
+            gap_list.append(value - centroid_list[pos - 1])
+        if last < max_buckets:
+            continue
+
+        # Merge the 2 buckets with the least gap between centroid values, the first pair if there are many
+        index = gap_list.index(min(gap_list))
+        new_count = count_list[index] + count_list[index + 1]
+        # Buckets left empty by reshape have no weight, the merged bucket keeps the left centroid
+        if new_count > 0:
+            centroid_list[index] = (centroid_list[index] * count_list[index]
+                                    + centroid_list[index + 1] * count_list[index + 1]) / new_count
+        count_list[index] = new_count
+        del centroid_list[index + 1]
+        del count_list[index + 1]
+        # The gap between the pair is gone, the ones on either side now end at the merged bucket
+        del gap_list[index]
+        centroid = centroid_list[index]
+        if index > 0:
+            gap_list[index - 1] = centroid - centroid_list[index - 1]
+        if index < last - 1:
+            gap_list[index] = centroid_list[index + 1] - centroid
+
+    n = len(centroid_list)
+    centroids[:n] = centroid_list
+    counts[:n] = count_list
+    return n
+
+
+def _bulk_combine(centroids, counts, max_buckets):
+    """
+    Combine the sorted buckets, closest pair first, until max_buckets are left.  The buckets are linked to their
+    neighbours by index, so a merge does not shift the arrays; the remaining buckets are moved to the front at the end.
+    :return: New number of buckets
+    """
+    # Python lists are a lot faster than numpy arrays one element at a time, results are written back at the end
+    n = len(centroids)
+    centroid_list = centroids.tolist()
+    count_list = counts.tolist()
+    prev_index = list(range(-1, n - 1))
+    next_index = list(range(1, n + 1))
+    alive = [True] * n
+    # Min-heap of (gap, left bucket index).  The entries of the pairs which no longer exist are skipped when popped
+    heap = [(centroid_list[index + 1] - centroid_list[index], index) for index in range(n - 1)]
+    heapq.heapify(heap)
+
+    remaining = n
+    while remaining > max_buckets:
+        gap, left = heapq.heappop(heap)
+        right = next_index[left]
+        if not alive[left] or right >= n or centroid_list[right] - centroid_list[left] != gap:
+            continue
+
+        # Merge the right bucket into the left one and unlink it
+        new_count = count_list[left] + count_list[right]
+        # Buckets left empty by reshape have no weight, the merged bucket keeps the left centroid
+        if new_count > 0:
+            centroid_list[left] = (centroid_list[left] * count_list[left]
+                                   + centroid_list[right] * count_list[right]) / new_count
+        count_list[left] = new_count
+        alive[right] = False
+        right = next_index[right]
+        next_index[left] = right
+        if right < n:
+            prev_index[right] = left
+            heapq.heappush(heap, (centroid_list[right] - centroid_list[left], left))
+        if prev_index[left] >= 0:
+            heapq.heappush(heap, (centroid_list[left] - centroid_list[prev_index[left]], prev_index[left]))
+        remaining -= 1
+
+    # Move the remaining buckets to the front, they are in sorted order already
+    kept = [bucket for bucket in range(n) if alive[bucket]]
+    centroids[:remaining] = [centroid_list[bucket] for bucket in kept]
+    counts[:remaining] = [count_list[bucket] for bucket in kept]
+    return remaining
+
+
+def _psi(reference_counts, compare_counts, reference_total, compare_total):
+    """
+    Population stability index of the 2 histograms with same buckets.  Buckets with no points in either of the
+    histograms are left out
+    """
+    reference_pct = reference_counts / reference_total
+    compare_pct = compare_counts / compare_total
+    mask = (reference_pct > 0) & (compare_pct > 0)
+    reference_pct = reference_pct[mask]
+    compare_pct = compare_pct[mask]
+    return float(((compare_pct - reference_pct) * np.log(compare_pct / reference_pct)).sum())
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _move(array, start, stop, offset):
+        # numba copies overlapping slices through a temporary array, so copy element by element in the direction
+        # which does not overwrite the values yet to be moved
+        if offset > 0:
+            for index in range(stop - 1, start - 1, -1):
+                array[index + offset] = array[index]
+        else:
+            for index in range(start, stop):
+                array[index + offset] = array[index]
+
+    _insert_bucket = numba.njit(cache=True)(_insert_bucket)
+    # No fastmath, merging has to give the same result as the C implementation
+    _merge_pair = numba.njit(cache=True)(_merge_pair)
+
+    @numba.njit(cache=True)
+    def _combine_min(centroids, counts, n):
+        # Single scan for the first minimum gap, no temporary array of gaps
+        index = 0
+        min_gap = centroids[1] - centroids[0]
+        for j in range(1, n - 1):
+            gap = centroids[j + 1] - centroids[j]
+            if gap < min_gap:
+                min_gap = gap
+                index = j
+        return _merge_pair(centroids, counts, n, index)
+
+    @numba.njit(cache=True)
+    def _push_value(centroids, counts, n, max_buckets, value):
+        pos = np.searchsorted(centroids[:n], value, side='left')
+        if pos < n and centroids[pos] == value:
+            counts[pos] += 1
+            return n, False
+        n = _insert_bucket(centroids, counts, n, pos, value, 1)
+        if n <= max_buckets:
+            return n, False
+        return _combine_min(centroids, counts, n), True
+
+    @numba.njit(cache=True)
+    def _push_values(centroids, counts, n, max_buckets, values):
+        for value in values:
+            n, _ = _push_value(centroids, counts, n, max_buckets, value)
+        return n
+
+    @numba.njit(cache=True)
+    def _bulk_combine(centroids, counts, max_buckets):
+        # Same as above, on the arrays directly
+        n = len(centroids)
+        prev_index = np.arange(-1, n - 1)
+        next_index = np.arange(1, n + 1)
+        alive = np.ones(n, dtype=np.bool_)
+        # Min-heap of (gap, left bucket index).  The entries of the pairs which no longer exist are skipped when popped
+        heap = [(centroids[index + 1] - centroids[index], index) for index in range(n - 1)]
+        heapq.heapify(heap)
+
+        remaining = n
+        while remaining > max_buckets:
+            gap, left = heapq.heappop(heap)
+            right = next_index[left]
+            if not alive[left] or right >= n or centroids[right] - centroids[left] != gap:
+                continue
+
+            # Merge the right bucket into the left one and unlink it
+            new_count = counts[left] + counts[right]
+            # Buckets left empty by reshape have no weight, the merged bucket keeps the left centroid
+            if new_count > 0:
+                centroids[left] = (centroids[left] * counts[left] + centroids[right] * counts[right]) / new_count
+            counts[left] = new_count
+            alive[right] = False
+            right = next_index[right]
+            next_index[left] = right
+            if right < n:
+                prev_index[right] = left
+                heapq.heappush(heap, (centroids[right] - centroids[left], left))
+            if prev_index[left] >= 0:
+                heapq.heappush(heap, (centroids[left] - centroids[prev_index[left]], prev_index[left]))
+            remaining -= 1
+
+        # Move the remaining buckets to the front, they are in sorted order already
+        index = 0
+        for bucket in range(n):
+            if alive[bucket]:
+                centroids[index] = centroids[bucket]
+                counts[index] = counts[bucket]
+                index += 1
+        return remaining
+
+    @numba.njit(cache=True, fastmath=True)
+    def _psi(reference_counts, compare_counts, reference_total, compare_total):
+        # Single pass over the buckets, without the temporary arrays of the numpy expression
+        psi_sum = 0.0
+        for index in range(len(reference_counts)):
+            reference_pct = reference_counts[index] / reference_total
+            compare_pct = compare_counts[index] / compare_total
+            if reference_pct > 0.0 and compare_pct > 0.0:
+                psi_sum += (compare_pct - reference_pct) * math.log(compare_pct / reference_pct)
+        return psi_sum
+
+
+# The C implementation, when built, takes over the streaming path
+if _c_push_value is not None:
+    _push_value = _c_push_value
+    _push_values = _c_push_values
+
+
 class StreamingHistogram(object):
 
     def __init__(self, max_buckets):
@@ -42,82 +347,181 @@ class StreamingHistogram(object):
             raise ValueError("Invalid number of buckets: {}".format(max_buckets))
 
         self.max_buckets = max_buckets
-        # Sorted list of buckets, sorted based on centroid
-        self.buckets = []
-        # Because the bisect module does not support insertion based on key, we track the
-        # centroids separately
-        self._centroids = []
+        # Buckets are stored as 2 parallel arrays (centroids and counts), sorted based on centroid.  The arrays are
+        # allocated once with room for one extra bucket, which is combined away as soon as it is pushed.  Only the
+        # first _n entries are valid.
+        self._centroids = np.empty(max_buckets + 1, dtype=np.float64)
+        self._counts = np.empty(max_buckets + 1, dtype=np.int64)
+        self._n = 0
         self._min = float('inf')
         self._max = float('-inf')
         self._count = 0
+        # Sum of centroid * count over the buckets.  Combining buckets does not change it, so it is only updated when
+        # points are added
+        self._area = 0.0
+        # True as long as every bucket holds the points of a single distinct value, i.e. nothing was combined
+        self._exact = True
 
     def __eq__(self, other):
         if not isinstance(other, self.__class__):
             return False
-        return self.buckets == other.buckets
+        return (np.array_equal(self._centroids[:self._n], other._centroids[:other._n])
+                and np.array_equal(self._counts[:self._n], other._counts[:other._n]))
+
+    @property
+    def buckets(self):
+        """
+        Sorted list of buckets.  Buckets are built on the fly, updating them does not update the histogram
+        :return:
+        """
+        return [HistogramBucket(centroid, count)
+                for centroid, count in zip(self._centroids[:self._n].tolist(), self._counts[:self._n].tolist())]
 
     @staticmethod
     def build_from_list(values, max_buckets):
+        """
+        Build the histogram from all the values at once.  Unlike pushing them one by one, the values are sorted first
+        and the closest buckets are combined looking at the whole list, so the result does not depend on the order of
+        the values.  Without numba combining the whole list is slower than streaming it, so the values are pushed one
+        by one instead and the result does depend on their order.
+        :param values:
+        :param max_buckets:
+        :return:
+        """
         histogram = StreamingHistogram(max_buckets)
-        histogram.push_list(values)
+        if numba is None:
+            histogram.push_list(values)
+            return histogram
+
+        values = _as_array(values)
+        if values.size == 0:
+            return histogram
+
+        centroids, counts = np.unique(values, return_counts=True)
+        histogram._min = float(centroids[0])
+        histogram._max = float(centroids[-1])
+        histogram._count = values.size
+        histogram._area = float(values.sum())
+        # With no more distinct values than buckets the histogram is exact, nothing to combine
+        n = len(centroids)
+        histogram._exact = n <= max_buckets
+        if n > max_buckets:
+            n = _bulk_combine(centroids, counts, max_buckets)
+        histogram._centroids[:n] = centroids[:n]
+        histogram._counts[:n] = counts[:n]
+        histogram._n = n
         return histogram
 
     def push_list(self, values):
-        for value in values:
-            self.push_value(value)
+        values = _as_array(values)
+        if values.size == 0:
+            return
+
+        # As long as the number of distinct centroids stays within max_buckets, no combine is fired and pushing
+        # the values one by one only increments counts / inserts new buckets.  So find the position in the stream
+        # where the first combine would happen and ingest everything before it in bulk.
+        uniques, first_index = np.unique(values, return_index=True)
+        known = self._known_centroids(uniques)
+        new_first_index = np.sort(first_index[~known])
+        free_buckets = max(self.max_buckets - self._n, 0)
+        split = new_first_index[free_buckets] if len(new_first_index) > free_buckets else len(values)
+
+        if split > 0:
+            self._push_exact(values[:split])
+        if split == len(values):
+            return
+
+        # Rest of the stream needs the combine step, values have to go in one at a time
+        values = values[split:]
+        self._n = _push_values(self._centroids, self._counts, self._n, self.max_buckets, values)
+        self._exact = False
+        self._count += len(values)
+        self._area += float(values.sum())
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+
+    def _known_centroids(self, values):
+        """
+        Mask of the sorted values which are already present as centroids
+        """
+        centroids = self._centroids[:self._n]
+        pos = np.searchsorted(centroids, values, side='left')
+        known = pos < self._n
+        known[known] = centroids[pos[known]] == values[known]
+        return known
+
+    def _push_exact(self, values):
+        """
+        Push the values which are known to fit in the histogram without any combine
+        """
+        n = self._n
+        uniques, counts = np.unique(values, return_counts=True)
+        known = self._known_centroids(uniques)
+        pos = np.searchsorted(self._centroids[:n], uniques[known], side='left')
+        self._counts[pos] += counts[known]
+
+        new_n = n + len(uniques) - len(pos)
+        if new_n > n:
+            centroids = np.concatenate((self._centroids[:n], uniques[~known]))
+            counts = np.concatenate((self._counts[:n], counts[~known]))
+            order = np.argsort(centroids, kind='stable')
+            self._centroids[:new_n] = centroids[order]
+            self._counts[:new_n] = counts[order]
+            self._n = new_n
+
+        self._count += len(values)
+        self._area += float(values.sum())
+        self._min = min(self._min, float(uniques[0]))
+        self._max = max(self._max, float(uniques[-1]))
 
     def push_value(self, value):
-        pos = bisect.bisect_left(self._centroids, value)
-        if pos < len(self.buckets) and self._centroids[pos] == value:
-            self.buckets[pos].count += 1
-            self._count += 1
-        else:
-            self.push_bucket(HistogramBucket(value, 1))
+        # Search, insert and combine happen in one kernel call, compiled when C or numba is available
+        self._n, combined = _push_value(self._centroids, self._counts, self._n, self.max_buckets, value)
+        if combined:
+            self._exact = False
+        self._count += 1
+        self._area += value
         if value < self._min:
             self._min = value
         if value > self._max:
             self._max = value
 
     def push_bucket(self, bucket):
-        # Push the bucket in our sorted array
-        #
-        # bisect module does not support key argument in 3.7 yet
-        # bisect.insort_left(self.buckets, bucket, key=lambda b: b.centroid)
-        # So, lets find the centroid position in centroid list and use same in the buckets list
-        self._count += bucket.count
-        pos = bisect.bisect_left(self._centroids, bucket.centroid)
-        self._centroids.insert(pos, bucket.centroid)
-        self.buckets.insert(pos, bucket)
-
-        if len(self.buckets) > self.max_buckets:
+        # The bucket may stand for points of many values
+        self._exact = False
+        self._push_centroid(bucket.centroid, bucket.count)
+
+    def _push_centroid(self, centroid, count):
+        pos = int(self._centroids[:self._n].searchsorted(centroid, side='left'))
+        self._insert(pos, centroid, count)
+
+    def _insert(self, pos, centroid, count):
+        # The arrays always have room for one bucket over max_buckets, insertion is done in place
+        centroid = float(centroid)
+        self._n = _insert_bucket(self._centroids, self._counts, self._n, pos, centroid, count)
+        self._count += count
+        self._area += centroid * count
+
+        if self._n > self.max_buckets:
             self.combine()
 
     def combine(self):
-        if len(self.buckets) == 1:
+        if self._n <= 1:
             return
-        # Find 2 buckets with the least gap between centroid values
-        bucket_1 = self.buckets[0]
-        bucket_2 = self.buckets[1]
-        min_centroid_diff = bucket_2.centroid - bucket_1.centroid
-        pair = (bucket_1, bucket_2)
-        index_to_remove = 1
-        for index in range(2, len(self.buckets)):
-            bucket_1 = bucket_2
-            bucket_2 = self.buckets[index]
-            # Note buckets are sorted by centroids
-            centroid_diff = bucket_2.centroid - bucket_1.centroid
-            if centroid_diff < min_centroid_diff:
-                pair = (bucket_1, bucket_2)
-                index_to_remove = index
-
-        # Now we found our pair, merge the 2nd one into first
-        pair[0].combine(pair[1])
-        self.buckets.pop(index_to_remove)
-        self._centroids.pop(index_to_remove)
-        self._centroids[index_to_remove - 1] = pair[0].centroid
+        self._exact = False
+        self._n = _combine_min(self._centroids, self._counts, self._n)
+
+    def exact(self):
+        """
+        Whether the histogram holds the exact distribution of the values pushed, i.e. there were never more distinct
+        values than max_buckets and no buckets were combined.  Quantiles of an exact histogram are same as those of
+        the values themselves
+        :return:
+        """
+        return self._exact and self._n <= self.max_buckets
 
     def is_sorted(self):
-        return all(self.buckets[i].centroid <= self.buckets[i + 1].centroid for i in range(len(self.buckets) - 1))
+        return bool(np.all(np.diff(self._centroids[:self._n]) >= 0))
 
     def merge(self, histogram):
         """
@@ -125,32 +529,47 @@ class StreamingHistogram(object):
         :param histogram:
         :return:
         """
-        for bucket in histogram.buckets:
-            self.push_bucket(bucket)
-            self.combine()
+        # Merge the 2 sorted bucket lists, then combine the closest buckets until we are within max_buckets
+        centroids = np.concatenate((self._centroids[:self._n], histogram._centroids[:histogram._n]))
+        counts = np.concatenate((self._counts[:self._n], histogram._counts[:histogram._n]))
+        order = np.argsort(centroids, kind='stable')
+        centroids = centroids[order]
+        counts = counts[order]
+        # Buckets of the 2 histograms with the same centroid become one bucket
+        if len(centroids):
+            run_start = np.flatnonzero(np.diff(centroids, prepend=np.nan))
+            centroids = centroids[run_start]
+            counts = np.add.reduceat(counts, run_start)
+        n = len(centroids)
+        self._exact = self._exact and histogram._exact and n <= self.max_buckets
+        if n > self.max_buckets:
+            n = _bulk_combine(centroids, counts, self.max_buckets)
+
+        self._centroids[:n] = centroids[:n]
+        self._counts[:n] = counts[:n]
+        self._n = n
+        self._count += histogram._count
+        self._area += histogram._area
+        self._min = min(self._min, histogram._min)
+        self._max = max(self._max, histogram._max)
 
     def print(self):
         for bucket in self.buckets:
             bucket.print()
 
     def get_frequencies(self):
-        return [bucket.count for bucket in self.buckets]
+        return self._counts[:self._n].tolist()
 
     def plot(self):
         import matplotlib.pyplot as plt
-        plt.hist(x=self._centroids, weights=self.get_frequencies())
+        plt.hist(x=self._centroids[:self._n], weights=self._counts[:self._n])
         plt.show()
 
     def count(self):
         return self._count
 
     def mean(self):
-        area = 0
-        items = 0
-        for bucket in self.buckets:
-            area += bucket.get_area()
-            items += bucket.count
-        return float(area/items)
+        return self._area / self._count
 
     def reshape(self, input_histogram):
         """
@@ -173,70 +592,67 @@ class StreamingHistogram(object):
         :param histogram:
         :return:
         """
-        # These are going to be new buckets for "this" histogram
-        new_buckets = list()
-        # First entry in bucket range will be negative infinity
-        bucket_ranges = [float('-inf')]
-        for bucket in input_histogram.buckets:
-            # For all new buckets, the centroids are going to be of those of input histogram, with count = 0
-            new_buckets.append(HistogramBucket(bucket.centroid, 0))
-            # Then all intermediate entries in the bucket range will be the centroids of input histogram
-            bucket_ranges.append(bucket.centroid)
-
-        # And final entry will be positive infinity
-        bucket_ranges.append(float('inf'))
-
-        # Now start scanning the buckets of "this" histogram
-        for this_histogram_bucket in self.buckets:
-            # Find out, in which bucket range, current bucket of "this" histogram falls into.  bisect_right will give
-            # us the next index
-            # -1 because bucket_ranges has extra boundaries with +/- infinity
-            bucket_index = bisect.bisect_right(bucket_ranges, this_histogram_bucket.centroid) - 1
-            if bucket_index == 0:
-                # If it falls between negative infinity and the first centroid, then we copy all the counts
-                # to the bucket at 0th index
-                new_buckets[0].count += this_histogram_bucket.count
-            elif bucket_index == len(new_buckets):
-                # If it falls between the last bucket and positive infinity, then we copy all the counts to the
-                # last bucket
-                new_buckets[-1].count += this_histogram_bucket.count
-            else:
-                # Find out which bucket this centroid is closer to and add counts to that bucket
-                diff_prev = abs(this_histogram_bucket.centroid - new_buckets[bucket_index - 1].centroid)
-                diff_next = abs(new_buckets[bucket_index].centroid - this_histogram_bucket.centroid)
-                if diff_prev < diff_next:
-                    new_buckets[bucket_index - 1].count += this_histogram_bucket.count
-                else:
-                    new_buckets[bucket_index].count += this_histogram_bucket.count
-
-        # Set new buckets for "this" histogram
-        self.buckets = new_buckets
-        # and centroids
-        self._centroids = [bucket.centroid for bucket in self.buckets]
+        # For all new buckets, the centroids are going to be of those of input histogram
+        new_n = input_histogram._n
+        targets = input_histogram._centroids[:new_n]
+        # The bucket ranges are [-inf, centroid1, centroid2, ..., +inf].  Find out, in which bucket range each bucket
+        # of "this" histogram falls into.  With the infinities left out, searchsorted gives us the index of the
+        # range's upper boundary among the centroids
+        centroids = self._centroids[:self._n]
+        bucket_index = np.searchsorted(targets, centroids, side='right')
+        # If it falls between negative infinity and the first centroid (or between the last centroid and positive
+        # infinity), both neighbours are the first (last) bucket and all the counts go to it
+        prev_index = np.clip(bucket_index - 1, 0, new_n - 1)
+        next_index = np.clip(bucket_index, 0, new_n - 1)
+        # Otherwise find out which bucket this centroid is closer to and add counts to that bucket
+        diff_prev = np.abs(centroids - targets[prev_index])
+        diff_next = np.abs(targets[next_index] - centroids)
+        new_index = np.where(diff_prev < diff_next, prev_index, next_index)
+        # Buckets are sorted, so are their new indexes.  The count of each new bucket is the sum over a run of equal
+        # indexes
+        run_start = np.flatnonzero(np.diff(new_index, prepend=-1))
+        run_counts = np.add.reduceat(self._counts[:self._n], run_start) if self._n else self._counts[:0]
+
+        # Set new buckets for "this" histogram, in place unless they don't fit.  Keep room for one extra bucket, same
+        # as the constructor
+        if len(self._centroids) <= new_n:
+            capacity = max(self.max_buckets, new_n) + 1
+            self._centroids = np.empty(capacity, dtype=np.float64)
+            self._counts = np.empty(capacity, dtype=np.int64)
+        self._centroids[:new_n] = targets
+        self._counts[:new_n] = 0
+        self._counts[new_index[run_start]] = run_counts
+        self._n = new_n
+        self._exact = False
+        # Points moved to other centroids
+        self._area = float(np.dot(self._centroids[:new_n], self._counts[:new_n]))
 
     def clone(self):
         """
         Clone "this" histogram and return
         :return:
         """
-        clone = StreamingHistogram(len(self.buckets))
-        for bucket in self.buckets:
-            clone.push_bucket(bucket)
+        clone = StreamingHistogram(self._n)
+        clone._centroids[:self._n] = self._centroids[:self._n]
+        clone._counts[:self._n] = self._counts[:self._n]
+        clone._n = self._n
+        clone._min = self._min
+        clone._max = self._max
+        clone._count = self._count
+        clone._area = self._area
+        clone._exact = self._exact
 
         return clone
 
     def centroids_matching(self, input_histogram):
-        for index, bucket in enumerate(self.buckets):
-            if bucket.centroid != input_histogram.buckets[index].centroid:
-                return False
-        return True
+        return bool(np.array_equal(self._centroids[:self._n], input_histogram._centroids[:self._n]))
 
     def get_total_count(self):
         return self._count
 
     def compare_using_psi(self, input_histogram):
         reshape_required = False
-        if len(self.buckets) != len(input_histogram.buckets):
+        if self._n != input_histogram._n:
             reshape_required = True
         elif not self.centroids_matching(input_histogram):
             reshape_required = True
@@ -247,19 +663,5 @@ class StreamingHistogram(object):
         else:
             compare = input_histogram
 
-        psi_sum = 0
-        total_reference_count = self.get_total_count()
-        total_compare_count = compare.get_total_count()
-        for reference_bucket, compare_bucket in zip(self.buckets, compare.buckets):
-            reference_pct = reference_bucket.count / float(total_reference_count)
-            compare_pct = compare_bucket.count / float(total_compare_count)
-            if reference_pct == 0 or compare_pct == 0:
-                continue
-            psi = (compare_pct - reference_pct) * np.log(compare_pct/reference_pct)
-            psi_sum += psi
-
-        return psi_sum
-
-
-
-
+        return _psi(self._counts[:self._n], compare._counts[:compare._n],
+                    float(self.get_total_count()), float(compare.get_total_count()))
@@ -0,0 +1,15 @@
+#
+#   Builds the optional C implementation of the streaming histogram:
+#
+#       python setup.py build_ext --inplace
+#
+#   histogram.py falls back to numpy / numba when the extension is not built.
+#
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+# No floating point contraction, combining buckets has to give the same result as the Python implementation
+extension = Extension("_histogram", ["_histogram.pyx"], extra_compile_args=["-O3", "-march=native", "-ffp-contract=off"])
+
+setup(name="streaming_histogram", ext_modules=cythonize([extension]))
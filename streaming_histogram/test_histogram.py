@@ -1,5 +1,5 @@
 import random
-from histogram import StreamingHistogram
+from histogram import StreamingHistogram, numba
 
 
 def add_values_to_histogram(count, max_buckets):
@@ -78,3 +78,137 @@ def test_psi():
     inference_histogram.plot()
 
     print("PSI: {}".format(training_histogram.compare_using_psi(inference_histogram)))
+
+
+def test_list_histogram_repeated_values():
+    values = [float(random.randint(-20, 20)) for _ in range(1000)]
+    stream_histogram = StreamingHistogram(max_buckets=10)
+    for val in values:
+        stream_histogram.push_value(val)
+    list_histogram = StreamingHistogram(max_buckets=10)
+    list_histogram.push_list(values[:500])
+    list_histogram.push_list(values[500:])
+
+    assert stream_histogram == list_histogram
+    assert list_histogram.count() == 1000
+
+
+def test_combine_closest_pair():
+    histogram = StreamingHistogram(max_buckets=4)
+    histogram.push_list([0.0, 10.0, 11.0, 30.0, 31.5])
+    assert histogram.get_frequencies() == [1, 2, 1, 1]
+    assert histogram.buckets[1].centroid == 10.5
+
+
+def test_build_from_list():
+    values = [random.uniform(-32767.0, 32768.0) for _ in range(10000)]
+    histogram = StreamingHistogram.build_from_list(values, max_buckets=10)
+    assert histogram.count() == 10000
+    assert histogram.is_sorted()
+    assert len(histogram.buckets) == 10
+    assert abs(histogram.mean() - sum(values) / len(values)) < 1e-6
+
+    # Without numba the values are streamed, which depends on their order
+    if numba is not None:
+        random.shuffle(values)
+        assert StreamingHistogram.build_from_list(values, max_buckets=10) == histogram
+
+
+def test_mean():
+    values = [random.uniform(-32767.0, 32768.0) for _ in range(2000)]
+    histogram = StreamingHistogram(max_buckets=10)
+    histogram.push_list(values[:1000])
+    other = StreamingHistogram(max_buckets=10)
+    for val in values[1000:]:
+        other.push_value(val)
+    histogram.merge(other)
+    assert abs(histogram.mean() - sum(values) / len(values)) < 1e-6
+
+
+def test_exact_histogram():
+    values = [float(random.randint(-5, 4)) for _ in range(1000)]
+    stream_histogram = StreamingHistogram(max_buckets=10)
+    stream_histogram.push_list(values)
+    assert stream_histogram.exact()
+    assert StreamingHistogram.build_from_list(values, max_buckets=10) == stream_histogram
+    assert StreamingHistogram.build_from_list(values, max_buckets=10).exact()
+
+    stream_histogram.push_value(5.0)
+    assert not stream_histogram.exact()
+    assert stream_histogram.count() == 1001
+
+
+def test_merge_same_centroids():
+    values1 = [1.0, 1.0, 2.0]
+    values2 = [1.0, 3.0]
+    histogram = StreamingHistogram.build_from_list(values1, max_buckets=3)
+    histogram.merge(StreamingHistogram.build_from_list(values2, max_buckets=3))
+
+    assert histogram == StreamingHistogram.build_from_list(values1 + values2, max_buckets=3)
+    assert histogram.get_frequencies() == [3, 1, 1]
+    assert histogram.exact()
+    assert histogram.count() == 5
+
+
+def test_generator_values():
+    values = [random.uniform(-32767.0, 32768.0) for _ in range(1000)]
+    list_histogram = StreamingHistogram(max_buckets=10)
+    list_histogram.push_list(values)
+    generator_histogram = StreamingHistogram(max_buckets=10)
+    generator_histogram.push_list(value for value in values)
+
+    assert generator_histogram == list_histogram
+    assert StreamingHistogram.build_from_list(iter(values), 10) == StreamingHistogram.build_from_list(values, 10)
+
+
+def reshaped_to_empty_buckets():
+    # All the points go to the last of the 4 targets, leaving 3 empty buckets
+    histogram = StreamingHistogram.build_from_list([20.0, 21.0, 22.0], max_buckets=3)
+    histogram.reshape(StreamingHistogram.build_from_list([10.0, 11.0, 12.0, 13.0], max_buckets=4))
+    assert histogram.get_frequencies() == [0, 0, 0, 3]
+    return histogram
+
+
+def test_combine_empty_buckets():
+    histogram = reshaped_to_empty_buckets()
+    histogram.push_value(30.0)
+    assert histogram.get_frequencies() == [0, 0, 3, 1]
+    assert [bucket.centroid for bucket in histogram.buckets] == [10.0, 12.0, 13.0, 30.0]
+
+    histogram = reshaped_to_empty_buckets()
+    histogram.push_list([30.0, 31.0])
+    assert histogram.is_sorted()
+    assert histogram.count() == 5
+
+    histogram = reshaped_to_empty_buckets()
+    histogram.merge(StreamingHistogram.build_from_list([30.0], max_buckets=1))
+    assert histogram.get_frequencies() == [0, 3, 1]
+    assert [bucket.centroid for bucket in histogram.buckets] == [10.0, 13.0, 30.0]
+    assert histogram.count() == 4
+
+
+def test_reshape_counts():
+    target = StreamingHistogram.build_from_list([0.0, 10.0, 20.0], max_buckets=3)
+    # -5 is below the first target and 25 above the last one, 5 is half way between 0 and 10 and goes to the next
+    histogram = StreamingHistogram.build_from_list([-5.0, 3.0, 5.0, 5.0, 10.0, 14.0, 16.0, 25.0, 25.0, 25.0], 7)
+    histogram.reshape(target)
+    assert [bucket.centroid for bucket in histogram.buckets] == [0.0, 10.0, 20.0]
+    assert histogram.get_frequencies() == [2, 4, 4]
+    assert histogram.count() == 10
+    assert histogram.mean() == 12.0
+
+    # Target with more buckets than max_buckets of this histogram
+    target = StreamingHistogram.build_from_list([0.0, 2.0, 4.0, 6.0, 8.0], max_buckets=5)
+    histogram = StreamingHistogram.build_from_list([1.0, 2.0, 9.0], max_buckets=3)
+    histogram.reshape(target)
+    assert [bucket.centroid for bucket in histogram.buckets] == [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert histogram.get_frequencies() == [0, 2, 0, 0, 1]
+    histogram.push_value(5.0)
+    assert histogram.is_sorted()
+    assert histogram.count() == 4
+
+    # Reshape onto itself leaves the histogram as is
+    histogram = add_values_to_histogram(1000, 10)
+    buckets = [(bucket.centroid, bucket.count) for bucket in histogram.buckets]
+    histogram.reshape(histogram)
+    assert [(bucket.centroid, bucket.count) for bucket in histogram.buckets] == buckets